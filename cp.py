@@ -1,4 +1,16 @@
 import argparse
+import concurrent.futures
+import errno
+import io
+import mmap
+import os
+import stat
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 from pathlib import Path
 from sys import stderr, stdout
 
@@ -8,15 +20,32 @@ class CpError(Exception):
 
 
 class Logger:
+    # log is rebound between the real implementation and a no-op so
+    # non-verbose runs skip even the verbosity check per call.
+    # Messages go through a 1 MiB block-buffered wrapper around fd 1, so
+    # a verbose run over a big tree issues one write(1) per megabyte of
+    # output instead of one per line; flush() empties it at exit.
     def __init__(self, verbosity=False):
-        self.verbose = verbosity
+        self.out = io.TextIOWrapper(
+            os.fdopen(stdout.fileno(), 'wb', buffering=1 << 20, closefd=False),
+            line_buffering=False,
+        )
+        self._lock = threading.Lock()
+        self.set_verbosity(verbosity)
 
     def set_verbosity(self, verbosity):
         self.verbose = verbosity
+        self.log = self._log if verbosity else self._noop
+
+    def _log(self, message):
+        with self._lock:
+            self.out.write(f'MESSAGE: {message}\n')
+
+    def _noop(self, message):
+        pass
 
-    def log(self, message, file=stdout):
-        if self.verbose:
-            print(f'MESSAGE: {message}', file=file)
+    def flush(self):
+        self.out.flush()
 
     def warn(self, message, file=stderr):
         print(f'WARNING: {message}', file=file)
@@ -27,59 +56,354 @@ class Logger:
 
 logger = Logger()
 
+# File copies are independent I/O work, so directory trees are copied
+# through a thread pool; the pool is created in main() and left as None
+# in interactive mode, where stdin prompts force serial execution.
+executor = None
+
+
+# Reusable 1 MiB buffer for the chunked fallback path: large enough to
+# amortize syscalls on network filesystems, and allocated once per
+# worker thread so RSS stays constant no matter how big the copied
+# files are and concurrent fallback copies never share a buffer.
+_local = threading.local()
+
+
+def _buffer():
+    mv = getattr(_local, 'mv', None)
+    if mv is None:
+        mv = _local.mv = memoryview(bytearray(1 << 20))
+    return mv
 
-def dump(src: Path, dest: Path):
-    with open(src, 'rb') as s, open(dest, 'wb') as d:
-        d.write(s.read())
+# FICLONE from linux/fs.h: ask the filesystem to share the source's
+# extents with the destination (reflink). Instant regardless of file
+# size, but only valid on the same CoW filesystem (btrfs, xfs, ...);
+# any failure just falls through to the byte-copy paths.
+_FICLONE = 0x40049409
+
+
+_HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# dir_fd-relative syscalls (openat/mkdirat underneath) are available on
+# POSIX platforms; Windows falls back to full-path resolution.
+_DIR_FD_OK = os.open in os.supports_dir_fd and os.mkdir in os.supports_dir_fd
+
+# Cap on copies holding their fd pair at once. Fds are opened by the
+# walking thread but closed by the workers, so without backpressure the
+# walk outruns the pool and every queued file pins two fds until the
+# process hits RLIMIT_NOFILE (commonly 1024). Acquired before each open
+# pair, released when copy_one is done with the fds.
+_inflight = threading.BoundedSemaphore(64)
+
+# Size-class thresholds for dump(): below _SMALL_FILE the open/close
+# pair dominates and a single read/write is cheapest; above _LARGE_FILE
+# it pays to preallocate extents and manage the page cache explicitly.
+_SMALL_FILE = 4 * 1024
+_LARGE_FILE = 4 * (1 << 20)
+
+# Below this the buffered loop is fine; above it, platforms without
+# sendfile/copy_file_range map the source instead, saving one of the two
+# userspace copies per byte.
+_MMAP_MIN = 8 * (1 << 20)
+
+
+def _transfer(in_fd, out_fd, remaining):
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(out_fd, _FICLONE, in_fd)
+            return
+        except OSError:
+            pass
+    if remaining > _LARGE_FILE and hasattr(os, 'posix_fallocate'):
+        # Tell the filesystem the final size up front: one allocator pass
+        # and contiguous extents instead of growing the inode write by
+        # write. Filesystems that can't do it just decline.
+        try:
+            os.posix_fallocate(out_fd, 0, remaining)
+        except OSError:
+            pass
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(in_fd, out_fd, remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS):
+                raise
+    if hasattr(os, 'sendfile'):
+        try:
+            while remaining > 0:
+                sent = os.sendfile(out_fd, in_fd, None, remaining)
+                if sent == 0:
+                    break
+                remaining -= sent
+            return
+        except OSError as e:
+            # ENOTSOCK/EBADF: macOS and the BSDs have os.sendfile but only
+            # take a socket as the destination, so regular-file copies must
+            # drop to the fallbacks there.
+            if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP,
+                               errno.ENOTSOCK, errno.EBADF):
+                raise
+    if remaining > _MMAP_MIN:
+        try:
+            mm = mmap.mmap(in_fd, remaining, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+        else:
+            view = memoryview(mm)
+            try:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                offset = 0
+                while offset < remaining:
+                    offset += os.write(out_fd, view[offset:offset + _MMAP_MIN])
+                return
+            finally:
+                view.release()
+                mm.close()
+    mv = _buffer()
+    # Raw file object over the fd (left open for the caller) purely for
+    # readinto: it fills the buffer without allocating and, unlike
+    # os.readv, exists on Windows too.
+    with open(in_fd, 'rb', buffering=0, closefd=False) as reader:
+        while True:
+            n = reader.readinto(mv)
+            if not n:
+                break
+            pos = 0
+            while pos < n:
+                pos += os.write(out_fd, mv[pos:n])
+
+
+def copy_one(in_fd: int, out_fd: int, size=None):
+    # Takes ownership of both fds and of the _inflight slot acquired when
+    # they were opened; the callers open them (dir_fd-relative in
+    # copy_directory) so this stays pure syscall work.
+    try:
+        try:
+            try:
+                if size is None:
+                    size = os.fstat(in_fd).st_size
+                if size <= _SMALL_FILE:
+                    os.write(out_fd, os.read(in_fd, size))
+                elif size <= _LARGE_FILE:
+                    _transfer(in_fd, out_fd, size)
+                else:
+                    if _HAS_FADVISE:
+                        os.posix_fadvise(in_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    _transfer(in_fd, out_fd, size)
+                    if _HAS_FADVISE:
+                        # cp never rereads what it just copied; dropping both
+                        # files from the page cache keeps a long copy from
+                        # evicting pages other workloads still want. Dirty
+                        # destination pages have to hit disk first or DONTNEED
+                        # is a no-op.
+                        os.posix_fadvise(in_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                        os.fdatasync(out_fd)
+                        os.posix_fadvise(out_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(out_fd)
+        finally:
+            os.close(in_fd)
+    finally:
+        _inflight.release()
+
+
+def dump(src: Path, dest: Path, size=None):
+    _inflight.acquire()
+    try:
+        in_fd = os.open(src, os.O_RDONLY)
+        try:
+            out_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        except BaseException:
+            os.close(in_fd)
+            raise
+    except BaseException:
+        _inflight.release()
+        raise
+    copy_one(in_fd, out_fd, size)
 
 
 def copy_directory(src_dir: Path, dest_dir: Path, override=False, interactive=False):
-    for src_child in src_dir.iterdir():
-        dest_child = dest_dir / src_child.name
-        if src_child.is_dir():
-            logger.log(f'Copy dir {src_child} -> {dest_child}')
-            dest_child.mkdir(exist_ok=True)
-            copy_directory(src_child, dest_child, override, interactive)
-        elif src_child.is_file():
-            confirmed = True
-            if dest_child.is_file():
-                if interactive:
-                    confirmed = 'y' in input(f'Override {dest_child} ? [No/yes]: ').lower()
-                elif not override:
-                    confirmed = False
-    
-            if confirmed:
-                logger.log(f'Copy file {src_child} -> {dest_child}')
-                dest_child.touch()
-                dump(src_child, dest_child)
-            else:
-                logger.log(f'Skipping {src_child} -> {dest_child}')
+    # Bind everything the per-entry loop touches to locals once: each
+    # LOAD_ATTR / LOAD_GLOBAL avoided here is paid millions of times on
+    # a large tree.
+    log = logger.log
+    verbose = logger.verbose
+    error = logger.error
+    scandir = os.scandir
+    listdir = os.listdir
+    mkdir = os.mkdir
+    sep = os.sep
+    os_open = os.open
+    close = os.close
+    acquire = _inflight.acquire
+    dirfd_ok = _DIR_FD_OK
+    submit = executor.submit if executor is not None else None
+    futures = []
+    stack = [(str(src_dir), str(dest_dir))]
+    while stack:
+        src, dest = stack.pop()
+        # Hold an fd on both directories and do every syscall below
+        # relative to them (openat/mkdirat underneath): the kernel then
+        # resolves one component per file instead of rewalking the whole
+        # path. Platforms without dir_fd keep passing full paths.
+        if dirfd_ok:
+            src_fd = os_open(src, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                dest_fd = os_open(dest, os.O_RDONLY | os.O_DIRECTORY)
+            except BaseException:
+                close(src_fd)
+                raise
         else:
-            logger.error(f'Skipping {src_child} because file type is not supported')
+            src_fd = dest_fd = None
+        try:
+            with scandir(src_fd if dirfd_ok else src) as it:
+                # getdents yields entries in hash order; sorting by inode
+                # number (cached from the scan, no extra syscall) keeps reads
+                # roughly in on-disk order, which avoids seek thrash on
+                # spinning disks.
+                entries = sorted(it, key=lambda e: e.inode())
+            # One listdir answers every "does the destination already have
+            # this name" question for the directory, replacing a stat per
+            # file; prompts for conflicts happen up front so the copy loop
+            # below never blocks on stdin.
+            existing = frozenset(listdir(dest_fd if dirfd_ok else dest))
+            confirmations = {}
+            if interactive:
+                for entry in entries:
+                    if entry.name in existing and entry.is_file():
+                        confirmations[entry.name] = 'y' in input(
+                            f'Override {dest + sep + entry.name} ? [No/yes]: '
+                        ).lower()
+            for entry in entries:
+                name = entry.name
+                dest_child = dest + sep + name
+                # Default-follow type checks: non-symlink entries still answer
+                # from the cached d_type without a syscall, and symlinks get
+                # dereferenced like the rest of the tool does, instead of
+                # being rejected as unsupported.
+                if entry.is_dir():
+                    if verbose:
+                        log(f'Copy dir {src + sep + name} -> {dest_child}')
+                    # Plain mkdir: pathlib's exist_ok=True follows
+                    # FileExistsError with a stat to confirm it's a directory,
+                    # doubling the syscalls in the common hit case. If it's the
+                    # wrong type the copies below will fail on their own.
+                    try:
+                        mkdir(name if dirfd_ok else dest_child, 0o755, dir_fd=dest_fd)
+                    except FileExistsError:
+                        pass
+                    stack.append((src + sep + name, dest_child))
+                elif entry.is_file():
+                    confirmed = True
+                    if name in existing:
+                        if interactive:
+                            confirmed = confirmations[name]
+                        elif not override:
+                            confirmed = False
+
+                    if confirmed:
+                        if verbose:
+                            log(f'Copy file {src + sep + name} -> {dest_child}')
+                        # stat through the DirEntry: it resolves relative to
+                        # the scanned directory and is cached on the entry, so
+                        # copy_one() gets the size without a second stat on the
+                        # open fd.
+                        size = entry.stat().st_size
+                        # Blocks while 64 copies already hold fds, so the
+                        # walk can't open files faster than the workers
+                        # retire them.
+                        acquire()
+                        try:
+                            in_fd = os_open(name if dirfd_ok else src + sep + name,
+                                            os.O_RDONLY, dir_fd=src_fd)
+                            try:
+                                out_fd = os_open(name if dirfd_ok else dest_child,
+                                                 os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                                                 0o644, dir_fd=dest_fd)
+                            except BaseException:
+                                close(in_fd)
+                                raise
+                        except BaseException:
+                            _inflight.release()
+                            raise
+                        if submit is not None:
+                            futures.append(submit(copy_one, in_fd, out_fd, size))
+                            if len(futures) >= 1024:
+                                # _inflight caps unfinished copies at 64, so
+                                # almost all of these are done: surface their
+                                # errors now and drop them rather than keep
+                                # one future per file in the tree.
+                                still_pending = []
+                                for future in futures:
+                                    if future.done():
+                                        future.result()
+                                    else:
+                                        still_pending.append(future)
+                                futures = still_pending
+                        else:
+                            copy_one(in_fd, out_fd, size)
+                    elif verbose:
+                        log(f'Skipping {src + sep + name} -> {dest_child}')
+                else:
+                    error(f'Skipping {src + sep + name} because file type is not supported')
+        finally:
+            if dirfd_ok:
+                close(dest_fd)
+                close(src_fd)
+    if futures:
+        concurrent.futures.wait(futures)
+        for future in futures:
+            future.result()
 
 
-def copy_file(src: Path, dest: Path, override=False):
-    if dest.is_dir():
+def _stat_mode(path):
+    # ENOTDIR counts as "not there" the same way pathlib's is_file/is_dir
+    # treat it: a non-directory component means nothing exists at path.
+    try:
+        return os.stat(path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def copy_file(src: Path, dest: Path, override=False, size=None):
+    dest_mode = _stat_mode(dest)
+    if dest_mode is not None and stat.S_ISDIR(dest_mode):
         dest = dest / src.name
-    if dest.is_file() and not override:
+        dest_mode = _stat_mode(dest)
+    if dest_mode is not None and stat.S_ISREG(dest_mode) and not override:
         raise CpError(f'Cannot override {dest}, specify -o option')
     logger.log(f'Copy {src} -> {dest}')
-    dest.touch()
-    dump(src, dest)
+    dump(src, dest, size)
 
 
 def copy(src: Path, dest: Path, override=False, recursive=False, interactive=False):
-    if src.is_file():
-        copy_file(src, dest, override)
-    elif src.is_dir():
-        dest_is_dir = dest.is_dir()
-        if not dest_is_dir and dest.exists():
+    # One stat on each side and mode-bit tests instead of the
+    # is_file/is_dir/exists pathlib helpers, which each stat again.
+    try:
+        src_stat = os.stat(src)
+    except (FileNotFoundError, NotADirectoryError):
+        raise CpError('File type not supported')
+    if stat.S_ISREG(src_stat.st_mode):
+        copy_file(src, dest, override, src_stat.st_size)
+    elif stat.S_ISDIR(src_stat.st_mode):
+        dest_mode = _stat_mode(dest)
+        dest_is_dir = dest_mode is not None and stat.S_ISDIR(dest_mode)
+        if not dest_is_dir and dest_mode is not None:
             raise CpError(f'Destination {dest} is not a directory')
         if not recursive:
             raise CpError(f'Skipping directory {src} because -r is not present')
         if dest_is_dir:
             dest = dest / src.name
-        dest.mkdir(exist_ok=True)
+        try:
+            os.mkdir(dest, 0o755)
+        except FileExistsError:
+            pass
         copy_directory(src, dest, override, interactive)
     else:
         raise CpError('File type not supported')
@@ -126,10 +450,27 @@ def cli() -> argparse.Namespace:
 
 
 def main():
+    global executor
     args = cli()
     try:
         logger.set_verbosity(args.verbose)
-        copy(args.source, args.destination, args.override, args.recursive, args.interactive)
+        if not args.interactive:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) * 4)
+            )
+        try:
+            copy(args.source, args.destination, args.override, args.recursive, args.interactive)
+        except BaseException:
+            # Ctrl-C (or any error) must not drain the queued backlog:
+            # drop everything that hasn't started and only let the copies
+            # already on a worker finish.
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            logger.flush()
     except CpError as e:
         logger.error(e)
         exit(1)